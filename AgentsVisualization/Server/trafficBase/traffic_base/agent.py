@@ -1,11 +1,37 @@
-from mesa.discrete_space import CellAgent, FixedAgent
+from mesa.discrete_space import Cell, CellAgent, FixedAgent
 from collections import deque
+from .bfs import DIRECTIONS, DELTAS, OPPOSITE, MOVE_OFFSETS, UNREACHABLE, find_route
+
+# Index of each direction name in the direction tables shared with the route search
+DIRECTION_INDEX = {direction: i for i, direction in enumerate(DIRECTIONS)}
+# Diagonal moves for a lane change: advance while moving one lane to either side
+DIAGONAL_OFFSETS = (
+    ((-1, 1), (1, 1)),
+    ((-1, -1), (1, -1)),
+    ((1, -1), (1, 1)),
+    ((-1, -1), (-1, 1)),
+)
+# Whether two directions are compatible (not opposite), indexed by DIRECTION_INDEX + 1 so None is 0
+COMPATIBLE = tuple(
+    tuple(first < 0 or second < 0 or OPPOSITE[first] != second for second in range(-1, 4))
+    for first in range(-1, 4)
+)
+
+# Bits of the model's occupancy grid
+OBSTACLE_BIT = 1
+CAR_BIT = 2
 
 class Car(CellAgent):
     """
     Agent that represents a car in traffic simulation.
     Cars move following road directions and respect traffic lights.
     """
+    # Mesa's base classes keep a __dict__, so only the car's own attributes are slotted
+    __slots__ = (
+        "destination", "dest_id", "dest_x", "dest_y", "slot", "direction", "route",
+        "stuck_counter", "stuck_threshold", "last_cell",
+    )
+
     def __init__(self, model, cell, destination):
         """
         Creates a new car agent.
@@ -15,10 +41,13 @@ class Car(CellAgent):
             destination: The destination cell this car is heading to (required)
         """
         super().__init__(model)
+        self.destination = destination  # The assigned destination for this car
+        self.dest_id = destination.destination.dest_id  # Row of the model's dest_dist for it
+        self.dest_x, self.dest_y = destination.coordinate  # Destination never changes
+        self.slot = model.acquire_car_slot(self)  # Index into the model's car arrays
         self.cell = cell
         self.direction = None  # Will store the car's current direction
-        self.destination = destination  # The assigned destination for this car
-        self.route = []  # The planned route to the destination
+        self.route = deque()  # The planned route to the destination
 
         # Subsumption architecture state variables
         self.stuck_counter = 0  # How many steps the car has been stuck
@@ -28,177 +57,138 @@ class Car(CellAgent):
         # Calculate route when car is created
         self.calculate_route()
 
+    @property
+    def cell(self):
+        """The cell the car is currently in."""
+        return self._mesa_cell
+
+    @cell.setter
+    def cell(self, cell):
+        """Move the car and keep the occupancy grid and car arrays up to date."""
+        previous_cell = self._mesa_cell
+        CellAgent.cell.fset(self, cell)
+
+        occupancy = self.model.occupancy
+        if previous_cell is not None and not previous_cell.cars:
+            x, y = previous_cell.coordinate
+            occupancy[y, x] &= 0xFF ^ CAR_BIT
+        if cell is not None:
+            x, y = cell.coordinate
+            occupancy[y, x] |= CAR_BIT
+            self.model.car_x[self.slot] = x
+            self.model.car_y[self.slot] = y
+
+    def remove(self):
+        """Remove the car from the model, the active car registry and the car arrays."""
+        self.model.active_cars.discard(self)
+        self.model.release_car_slot(self.slot)
+        super().remove()
+
     def are_directions_compatible(self, dir1, dir2):
         """Check if two directions are compatible (not opposite)."""
-        if dir1 is None or dir2 is None:
-            return True
-
-        opposite_pairs = [
-            ("Up", "Down"),
-            ("Down", "Up"),
-            ("Left", "Right"),
-            ("Right", "Left")
-        ]
-
-        return (dir1, dir2) not in opposite_pairs
+        return COMPATIBLE[DIRECTION_INDEX.get(dir1, -1) + 1][DIRECTION_INDEX.get(dir2, -1) + 1]
 
     def calculate_route(self):
         """Calculate the route from current position to destination using BFS."""
-        # BFS to find path - now tracking direction to avoid opposite transitions
-        # Queue: (cell, path, last_valid_direction)
         initial_direction = self.get_road_direction()
-        queue = deque([(self.cell, [self.cell], initial_direction)])
-        visited = {self.cell}
 
-        while queue:
-            current_cell, path, path_direction = queue.popleft()
-
-            # If we reached the destination, save the route
-            if current_cell == self.destination:
-                self.route = path[1:]  # Exclude current cell
-                return
+        # Roads never change, so routes are shared between cars through the model's cache.
+        # The starting direction is part of the key since it limits the moves out of a traffic light.
+        route_key = (self.cell, self.destination, initial_direction)
+        cached_route = self.model.route_cache.get(route_key)
+        if cached_route is not None:
+            self.route = deque(cached_route)
+            return
 
-            # Get the direction of the current cell
-            cell_direction = None
-            for agent in current_cell.agents:
-                if isinstance(agent, Road):
-                    cell_direction = agent.direction
-                    break
-
-            # Use the cell's direction if available, otherwise keep the path direction
-            # This is critical for traffic lights and destinations that don't have direction
-            effective_direction = cell_direction if cell_direction is not None else path_direction
-
-            # If no road direction, this might be a traffic light or destination
-            # Check adjacent cells to continue
-            x, y = current_cell.coordinate
-            width, height = self.model.grid.dimensions
-
-            # Define possible moves based on EFFECTIVE direction (maintains direction through semaphores)
-            # Can move forward or change lanes (perpendicular), but CANNOT move in opposite direction
-            if effective_direction == "Up":
-                # Can move Up (forward), Left or Right (lane change), NOT Down (opposite)
-                next_positions = [(x, y + 1), (x - 1, y), (x + 1, y)]
-            elif effective_direction == "Down":
-                # Can move Down (forward), Left or Right (lane change), NOT Up (opposite)
-                next_positions = [(x, y - 1), (x - 1, y), (x + 1, y)]
-            elif effective_direction == "Right":
-                # Can move Right (forward), Up or Down (lane change), NOT Left (opposite)
-                next_positions = [(x + 1, y), (x, y + 1), (x, y - 1)]
-            elif effective_direction == "Left":
-                # Can move Left (forward), Up or Down (lane change), NOT Right (opposite)
-                next_positions = [(x - 1, y), (x, y + 1), (x, y - 1)]
-            else:
-                # No direction available, try all adjacent cells (shouldn't happen often)
-                next_positions = [(x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)]
-
-            # Explore next positions
-            for next_x, next_y in next_positions:
-                if 0 <= next_x < width and 0 <= next_y < height:
-                    next_cell = self.model.grid[(next_x, next_y)]
-
-                    if next_cell in visited:
-                        continue
-
-                    # Check if the cell is accessible (has a road, traffic light, or is destination)
-                    is_accessible = False
-                    next_cell_direction = None
-
-                    for agent in next_cell.agents:
-                        if isinstance(agent, Destination):
-                            # Only allow access if this is OUR assigned destination
-                            if next_cell == self.destination:
-                                is_accessible = True
-                            # Otherwise, treat it as an obstacle
-                            break
-                        elif isinstance(agent, (Road, Traffic_Light)):
-                            is_accessible = True
-                            if isinstance(agent, Road):
-                                next_cell_direction = agent.direction
-                            break
-
-                    # Verify the next cell's direction is compatible with EFFECTIVE direction (not opposite)
-                    # This ensures we don't go from Down to Up even through a semaphore
-                    if is_accessible and self.are_directions_compatible(effective_direction, next_cell_direction):
-                        visited.add(next_cell)
-                        # Pass the next cell's direction if it has one, otherwise keep effective direction
-                        next_path_direction = next_cell_direction if next_cell_direction is not None else effective_direction
-                        queue.append((next_cell, path + [next_cell], next_path_direction))
+        # BFS over the model's static road arrays, then map the positions back to cells
+        model = self.model
+        x, y = self.cell.coordinate
+        positions = find_route(
+            model.dir_grid, model.accessible, model.dest_dist[self.dest_id], x, y, self.dest_x, self.dest_y,
+            DIRECTION_INDEX.get(initial_direction, -1)
+        )
 
         # If no route found, route remains empty
-        self.route = []
+        width = model.width
+        self.route = deque(model.cells_flat[route_y * width + route_x] for route_x, route_y in positions.tolist())
+        model.route_cache[route_key] = tuple(self.route)
 
     def get_road_direction(self):
         """Get the direction of the road in the current cell."""
         # First check if there's a road in current cell
-        for agent in self.cell.agents:
-            if isinstance(agent, Road):
-                return agent.direction
+        road = self.cell.road
+        if road is not None:
+            return road.direction
         # If no road (e.g., in a traffic light cell), use the car's remembered direction
         return self.direction
 
-    def get_next_position(self, direction):
-        """Calculate next position based on direction."""
-        x, y = self.cell.coordinate
-
-        if direction == "Up":
-            return (x, y + 1)
-        elif direction == "Down":
-            return (x, y - 1)
-        elif direction == "Right":
-            return (x + 1, y)
-        elif direction == "Left":
-            return (x - 1, y)
-
-        return None
-
     def can_move_to_cell(self, cell):
         """Check if the car can move to the given cell."""
         if cell is None:
             return False
 
-        # Check if there's another car in the cell
-        for agent in cell.agents:
-            if isinstance(agent, Car):
-                return False
-
-        # Check if there's an obstacle
-        for agent in cell.agents:
-            if isinstance(agent, Obstacle):
-                return False
-
-        return True
+        # Blocked by another car or by an obstacle
+        x, y = cell.coordinate
+        return self.model.occupancy[y, x] == 0
 
     def has_green_light_at_cell(self, cell):
         """Check if there's a traffic light in the given cell and if it's green."""
-        for agent in cell.agents:
-            if isinstance(agent, Traffic_Light):
-                # Traffic light exists, check if it's green (state = True)
-                return agent.state
-        # No traffic light, can proceed
-        return True
+        x, y = cell.coordinate
+        tl_idx = self.model.tl_index[y, x]
+        # No traffic light, can proceed; otherwise green means state = True
+        return tl_idx < 0 or self.model.tl_state[tl_idx]
 
     def can_exit_current_cell(self):
         """Check if car can exit current cell (for traffic lights in current position)."""
         # If current cell has a red traffic light, car cannot exit
-        for agent in self.cell.agents:
-            if isinstance(agent, Traffic_Light):
-                if not agent.state:  # Red light
-                    return False
-        return True
+        return self.has_green_light_at_cell(self.cell)
 
     def is_at_destination(self):
         """Check if the car has reached its assigned destination."""
         return self.cell == self.destination
 
+    def distance_to_destination(self, cell):
+        """Number of moves from the given cell to this car's destination (UNREACHABLE if none)."""
+        x, y = cell.coordinate
+        return self.model.dest_dist[self.dest_id, y, x]
+
+    def get_closest_cell_to_destination(self):
+        """
+        Get the neighbor cell the car may move to that is closest to its destination,
+        using the distance fields precomputed by the model.
+        Returns None if no allowed move leads to the destination.
+        """
+        x, y = self.cell.coordinate
+        model = self.model
+        width, height = model.width, model.height
+        current_direction = self.get_road_direction()
+        direction_idx = DIRECTION_INDEX.get(current_direction)
+        offsets = MOVE_OFFSETS[direction_idx] if direction_idx is not None else DELTAS
+
+        closest_cell = None
+        closest_distance = UNREACHABLE
+        for dx, dy in offsets:
+            next_x, next_y = x + dx, y + dy
+            if not (0 <= next_x < width and 0 <= next_y < height):
+                continue
+
+            next_cell = model.cells_flat[next_y * width + next_x]
+            distance = self.distance_to_destination(next_cell)
+            if distance < closest_distance and self.are_directions_compatible(
+                current_direction, self.get_next_cell_direction(next_cell)
+            ):
+                closest_cell = next_cell
+                closest_distance = distance
+
+        return closest_cell
+
     def get_direction_to_destination(self):
         """Calculate which direction would move the car closer to its destination."""
         current_x, current_y = self.cell.coordinate
-        dest_x, dest_y = self.destination.coordinate
 
         # Determine if we need to move more in X or Y direction
-        delta_x = dest_x - current_x
-        delta_y = dest_y - current_y
+        delta_x = self.dest_x - current_x
+        delta_y = self.dest_y - current_y
 
         # Return the direction that moves us closer to destination
         # Prioritize the axis with greater distance
@@ -216,14 +206,15 @@ class Car(CellAgent):
     def get_adjacent_cells(self):
         """Get all adjacent cells (for lane changing)."""
         x, y = self.cell.coordinate
-        width, height = self.model.grid.dimensions
+        model = self.model
+        width, height = model.width, model.height
 
         adjacent = []
         # Check all 4 adjacent cells (not diagonal)
-        for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
+        for dx, dy in DELTAS:
             new_x, new_y = x + dx, y + dy
             if 0 <= new_x < width and 0 <= new_y < height:
-                adjacent.append(self.model.grid[(new_x, new_y)])
+                adjacent.append(model.cells_flat[new_y * width + new_x])
 
         return adjacent
 
@@ -233,38 +224,17 @@ class Car(CellAgent):
         Lane changes must be diagonal: moving forward while changing lanes.
         """
         x, y = self.cell.coordinate
-        width, height = self.model.grid.dimensions
+        model = self.model
+        width, height = model.width, model.height
         current_direction = self.get_road_direction()
+        if current_direction is None:
+            return []
 
         diagonal_cells = []
-
-        if current_direction == "Up":
-            # Can move diagonally: up-left or up-right
-            for dx in [-1, 1]:
-                new_x, new_y = x + dx, y + 1
-                if 0 <= new_x < width and 0 <= new_y < height:
-                    diagonal_cells.append(self.model.grid[(new_x, new_y)])
-
-        elif current_direction == "Down":
-            # Can move diagonally: down-left or down-right
-            for dx in [-1, 1]:
-                new_x, new_y = x + dx, y - 1
-                if 0 <= new_x < width and 0 <= new_y < height:
-                    diagonal_cells.append(self.model.grid[(new_x, new_y)])
-
-        elif current_direction == "Right":
-            # Can move diagonally: right-up or right-down
-            for dy in [-1, 1]:
-                new_x, new_y = x + 1, y + dy
-                if 0 <= new_x < width and 0 <= new_y < height:
-                    diagonal_cells.append(self.model.grid[(new_x, new_y)])
-
-        elif current_direction == "Left":
-            # Can move diagonally: left-up or left-down
-            for dy in [-1, 1]:
-                new_x, new_y = x - 1, y + dy
-                if 0 <= new_x < width and 0 <= new_y < height:
-                    diagonal_cells.append(self.model.grid[(new_x, new_y)])
+        for dx, dy in DIAGONAL_OFFSETS[DIRECTION_INDEX[current_direction]]:
+            new_x, new_y = x + dx, y + dy
+            if 0 <= new_x < width and 0 <= new_y < height:
+                diagonal_cells.append(model.cells_flat[new_y * width + new_x])
 
         return diagonal_cells
 
@@ -282,18 +252,9 @@ class Car(CellAgent):
             if not self.has_green_light_at_cell(diag_cell):
                 continue
 
-            # Check if this cell has a road
-            road_dir = None
-            is_destination = False
-            for agent in diag_cell.agents:
-                if isinstance(agent, Road):
-                    road_dir = agent.direction
-                    break
-                elif isinstance(agent, Destination):
-                    # Only allow if it's OUR destination
-                    if diag_cell == self.destination:
-                        is_destination = True
-                    break
+            # Check if this cell has a road, or is OUR destination
+            road_dir = self.get_next_cell_direction(diag_cell)
+            is_destination = diag_cell == self.destination
 
             # If the diagonal cell's direction is better for reaching destination, change lanes
             if road_dir == desired_direction or is_destination:
@@ -306,10 +267,8 @@ class Car(CellAgent):
 
     def get_next_cell_direction(self, cell):
         """Get the direction of the road in the given cell."""
-        for agent in cell.agents:
-            if isinstance(agent, Road):
-                return agent.direction
-        return None
+        road = cell.road
+        return road.direction if road is not None else None
 
     def is_stuck(self):
         """Check if the car is stuck (hasn't moved for several steps)."""
@@ -335,7 +294,7 @@ class Car(CellAgent):
         SUBSUMPTION BEHAVIOR: Try to find an alternative lane to avoid traffic (DIAGONAL ONLY).
         This is triggered when the car is stuck.
         """
-        if not self.route or len(self.route) == 0:
+        if not self.route:
             return False
 
         current_direction = self.get_road_direction()
@@ -343,30 +302,20 @@ class Car(CellAgent):
             return False
 
         # Check DIAGONAL cells for an alternative lane (advance + lane change)
+        best_cell = None
+        best_direction = None
+        best_distance = UNREACHABLE
         for diag_cell in self.get_diagonal_lane_change_cells():
             # Skip if cell is blocked
             if not self.can_move_to_cell(diag_cell):
                 continue
 
             # Get direction of diagonal cell and check for destinations
-            diag_direction = None
-            is_valid_destination = False
-
-            for agent in diag_cell.agents:
-                if isinstance(agent, Road):
-                    diag_direction = agent.direction
-                    break
-                elif isinstance(agent, Destination):
-                    # Only allow if it's OUR destination
-                    if diag_cell == self.destination:
-                        is_valid_destination = True
-                    else:
-                        # Not our destination, treat as obstacle
-                        diag_direction = None
-                    break
-
-            # Skip if it's a destination that's not ours
-            if not is_valid_destination and diag_direction is None and any(isinstance(a, Destination) for a in diag_cell.agents):
+            diag_direction = self.get_next_cell_direction(diag_cell)
+            is_valid_destination = diag_cell == self.destination
+
+            # Skip if it's a destination that's not ours, treat it as an obstacle
+            if diag_cell.destination is not None and not is_valid_destination:
                 continue
 
             # Only change lanes if destination cell direction is compatible
@@ -374,18 +323,24 @@ class Car(CellAgent):
                 continue
 
             # Check if this lane leads closer to destination
-            if diag_direction is not None or is_valid_destination:
-                # Move to alternative lane
-                self.cell = diag_cell
-                if diag_direction:
-                    self.direction = diag_direction
+            distance = self.distance_to_destination(diag_cell)
+            if (diag_direction is not None or is_valid_destination) and distance < best_distance:
+                best_cell = diag_cell
+                best_direction = diag_direction
+                best_distance = distance
 
-                # Recalculate route from new position
-                self.calculate_route()
-                self.stuck_counter = 0  # Reset stuck counter
-                return True
+        if best_cell is None:
+            return False
 
-        return False
+        # Move to the alternative lane closest to the destination
+        self.cell = best_cell
+        if best_direction:
+            self.direction = best_direction
+
+        # Recalculate route from new position
+        self.calculate_route()
+        self.stuck_counter = 0  # Reset stuck counter
+        return True
 
     def step(self):
         """
@@ -417,25 +372,40 @@ class Car(CellAgent):
 
         # If no route or route is empty, try to move forward in current direction
         if not self.route:
-            # Fallback: move in current road direction
-            direction = self.get_road_direction()
-            if direction is None:
-                return
-
-            self.direction = direction
-            next_pos = self.get_next_position(direction)
-
-            if next_pos is None:
+            # Fallback: head to the neighbor closest to the destination, if any leads there
+            next_cell = self.get_closest_cell_to_destination()
+            if next_cell is not None:
+                # Can enter any cell (including red lights)
+                if self.can_move_to_cell(next_cell):
+                    self.cell = next_cell
+                    road = next_cell.road
+                    if road is not None:
+                        self.direction = road.direction
+                    self.stuck_counter = 0
+                else:
+                    self.stuck_counter += 1
                 return
 
-            width, height = self.model.grid.dimensions
-            x, y = next_pos
+            # Otherwise move in current road direction
+            model = self.model
+            width, height = model.width, model.height
+            x, y = self.cell.coordinate
+            direction_idx = model.dir_grid[y, x]
+            if direction_idx < 0:
+                # No road (e.g., in a traffic light cell), use the remembered direction
+                if self.direction is None:
+                    return
+                direction_idx = DIRECTION_INDEX[self.direction]
+
+            self.direction = DIRECTIONS[direction_idx]
+            dx, dy = DELTAS[direction_idx]
+            x, y = x + dx, y + dy
 
             if x < 0 or x >= width or y < 0 or y >= height:
                 self.remove()
                 return
 
-            next_cell = self.model.grid[next_pos]
+            next_cell = model.cells_flat[y * width + x]
 
             # Can enter any cell (including red lights)
             if self.can_move_to_cell(next_cell):
@@ -469,12 +439,11 @@ class Car(CellAgent):
 
         # PRIORITY 6: Route Following - All checks passed, move to next cell
         self.cell = next_cell
-        self.route.pop(0)  # Remove the cell we just moved to from the route
+        self.route.popleft()  # Remove the cell we just moved to from the route
 
-        # Update direction based on current road
-        direction = self.get_road_direction()
-        if direction is not None:
-            self.direction = direction
+        # Update direction based on current road, already read before moving
+        if next_cell_direction is not None:
+            self.direction = next_cell_direction
 
         # Check if car actually moved
         if self.cell == previous_cell:
@@ -485,7 +454,11 @@ class Car(CellAgent):
 class Traffic_Light(FixedAgent):
     """
     Traffic light. Where the traffic lights are in the grid.
+    The state of every light lives in the model's tl_state array, which the
+    model toggles for all lights at once in step_traffic_lights.
     """
+    __slots__ = ("initial_state", "timeToChange", "tl_idx")
+
     def __init__(self, model, cell, state = False, timeToChange = 10):
         """
         Creates a new Traffic light.
@@ -497,23 +470,21 @@ class Traffic_Light(FixedAgent):
         """
         super().__init__(model)
         self.cell = cell
-        self.state = state
+        self.initial_state = state
         self.timeToChange = timeToChange
-        self.counter = 0  # Internal counter for this traffic light
+        self.tl_idx = None  # Index into the model's traffic light arrays, set by the model
 
-    def step(self):
-        """
-        To change the state (green or red) of the traffic light in case you consider the time to change of each traffic light.
-        """
-        self.counter += 1
-        if self.counter >= self.timeToChange:
-            self.state = not self.state
-            self.counter = 0  # Reset counter
+    @property
+    def state(self):
+        """Whether the traffic light is green (True) or red (False)."""
+        return bool(self.model.tl_state[self.tl_idx])
 
 class Destination(FixedAgent):
     """
     Destination agent. Where each car should go.
     """
+    __slots__ = ("dest_id",)
+
     def __init__(self, model, cell):
         """
         Creates a new destination agent
@@ -523,11 +494,14 @@ class Destination(FixedAgent):
         """
         super().__init__(model)
         self.cell = cell
+        self.dest_id = None  # Row of the model's dest_dist for this destination, set by the model
 
 class Obstacle(FixedAgent):
     """
     Obstacle agent. Just to add obstacles to the grid.
     """
+    __slots__ = ()
+
     def __init__(self, model, cell):
         """
         Creates a new obstacle.
@@ -543,6 +517,8 @@ class Road(FixedAgent):
     """
     Road agent. Determines where the cars can move, and in which direction.
     """
+    __slots__ = ("direction",)
+
     def __init__(self, model, cell, direction= "Left"):
         """
         Creates a new road.
@@ -553,3 +529,55 @@ class Road(FixedAgent):
         super().__init__(model)
         self.cell = cell
         self.direction = direction
+
+
+class CityCell(Cell):
+    """
+    Grid cell that keeps direct references to the agents it holds.
+    Fixed agents are stored when the map is built and cars are tracked as they
+    enter and leave, so cars can query a cell without scanning its agents.
+    """
+    __slots__ = ["road", "traffic_light", "destination", "obstacle", "cars"]
+
+    def __init__(self, coordinate, capacity=None, random=None):
+        """
+        Creates a new city cell.
+        Args:
+            coordinate: The position of the cell in the grid
+            capacity: The maximum number of agents in the cell
+            random: The random number generator of the grid
+        """
+        super().__init__(coordinate, capacity, random)
+        self.road = None
+        self.traffic_light = None
+        self.destination = None
+        self.obstacle = None
+        self.cars = []
+
+    def add_agent(self, agent):
+        """Add an agent to the cell and store it in its typed slot."""
+        super().add_agent(agent)
+        if isinstance(agent, Car):
+            self.cars.append(agent)
+        elif isinstance(agent, Road):
+            self.road = agent
+        elif isinstance(agent, Traffic_Light):
+            self.traffic_light = agent
+        elif isinstance(agent, Destination):
+            self.destination = agent
+        elif isinstance(agent, Obstacle):
+            self.obstacle = agent
+
+    def remove_agent(self, agent):
+        """Remove an agent from the cell and clear its typed slot."""
+        super().remove_agent(agent)
+        if isinstance(agent, Car):
+            self.cars.remove(agent)
+        elif agent is self.road:
+            self.road = None
+        elif agent is self.traffic_light:
+            self.traffic_light = None
+        elif agent is self.destination:
+            self.destination = None
+        elif agent is self.obstacle:
+            self.obstacle = None
@@ -1,8 +1,11 @@
 from mesa import Model
+from mesa.agent import AgentSet
 from mesa.discrete_space import OrthogonalMooreGrid
 from mesa.datacollection import DataCollector
 from .agent import *
+from collections import deque
 import json
+import numpy as np
 
 
 class CityModel(Model):
@@ -19,13 +22,29 @@ class CityModel(Model):
         super().__init__(seed=seed)
 
         # Load the map dictionary. The dictionary maps the characters in the map file to the corresponding agent.
-        dataDictionary = json.load(open("city_files/mapDictionary.json"))
+        with open("city_files/mapDictionary.json") as dictionaryFile:
+            dataDictionary = json.load(dictionaryFile)
 
         self.num_agents = N
         self.spawn_interval = spawn_interval  # How often to spawn cars (in steps)
         self.traffic_lights = []
         self.spawn_points = []  # Will store the 4 corners as spawn points
+        self.blocked_spawn_ticks = 0  # Consecutive spawn attempts with every corner blocked
+        self.max_blocked_spawn_ticks = 50  # Blocked attempts in a row before ending the simulation
         self.destinations = []  # Will store all destination cells
+        self.roads = []  # Will store all Road agents
+        self.obstacles = []  # Will store all Obstacle agents
+        self.route_cache = {}  # Routes by (start cell, destination cell, start direction)
+        # Cars currently in the simulation, the only agents that need stepping
+        self.active_cars = AgentSet([], random=self.random)
+
+        # Cars as parallel arrays indexed by Car.slot; free slots are reused
+        self.car_ids = np.zeros(64, dtype=np.int64)
+        self.car_x = np.zeros(64, dtype=np.int32)
+        self.car_y = np.zeros(64, dtype=np.int32)
+        self.car_alive = np.zeros(64, dtype=np.bool_)
+        self.num_car_slots = 0  # Slots handed out so far
+        self.free_car_slots = []  # Slots released by removed cars
 
         # Metrics
         self.total_spawned = 0  # Total cars spawned during simulation
@@ -42,39 +61,91 @@ class CityModel(Model):
         )
 
         # Load the map file. The map file is a text file where each character represents an agent.
-        with open("city_files/2025_base.txt") as baseFile:
-            lines = baseFile.readlines()
-            self.width = len(lines[0].strip())  # Remove newline character
-            self.height = len(lines)
+        # It is read into a character grid indexed [y, x], so the first line of the file is the top row.
+        with open("city_files/2025_base.txt", "rb") as baseFile:
+            rows = baseFile.read().split()
+        chars = np.frombuffer(b"".join(rows), dtype=np.uint8).reshape(len(rows), -1)[::-1]
+        self.height, self.width = chars.shape
+
+        self.grid = OrthogonalMooreGrid(
+            [self.width, self.height], capacity=100, torus=False,
+            cell_klass=CityCell
+        )
 
-            self.grid = OrthogonalMooreGrid(
-                [self.width, self.height], capacity=100, torus=False
+        # Road direction index per cell, indexed [y, x]; -1 where there is no road
+        direction_lut = np.full(256, -1, dtype=np.int8)
+        for col in ["v", "^", ">", "<"]:
+            direction_lut[ord(col)] = DIRECTION_INDEX[dataDictionary[col]]
+        self.dir_grid = direction_lut[chars]
+        # Occupancy per cell, indexed [y, x]; OBSTACLE_BIT and CAR_BIT flags
+        self.occupancy = np.where(chars == ord("#"), OBSTACLE_BIT, 0).astype(np.uint8)
+        # Index into self.traffic_lights per cell, indexed [y, x]; -1 where there is no light
+        self.tl_index = np.full((self.height, self.width), -1, dtype=np.int32)
+
+        # Creates the agents of each type, visiting only the cells that hold that type.
+        for y, x in np.argwhere(self.dir_grid >= 0).tolist():
+            agent = Road(self, self.grid[(x, y)], DIRECTIONS[self.dir_grid[y, x]])
+            self.roads.append(agent)
+
+        for y, x in np.argwhere((chars == ord("S")) | (chars == ord("s"))).tolist():
+            col = chr(chars[y, x])
+            agent = Traffic_Light(
+                self,
+                self.grid[(x, y)],
+                False if col == "S" else True,
+                int(dataDictionary[col]),
             )
-
-            # Goes through each character in the map file and creates the corresponding agent.
-            for r, row in enumerate(lines):
-                for c, col in enumerate(row.strip()):
-
-                    cell = self.grid[(c, self.height - r - 1)]
-
-                    if col in ["v", "^", ">", "<"]:
-                        agent = Road(self, cell, dataDictionary[col])
-
-                    elif col in ["S", "s"]:
-                        agent = Traffic_Light(
-                            self,
-                            cell,
-                            False if col == "S" else True,
-                            int(dataDictionary[col]),
-                        )
-                        self.traffic_lights.append(agent)
-
-                    elif col == "#":
-                        agent = Obstacle(self, cell)
-
-                    elif col == "D":
-                        agent = Destination(self, cell)
-                        self.destinations.append(cell)
+            agent.tl_idx = len(self.traffic_lights)
+            self.traffic_lights.append(agent)
+            self.tl_index[y, x] = agent.tl_idx
+
+        for y, x in np.argwhere(chars == ord("#")).tolist():
+            agent = Obstacle(self, self.grid[(x, y)])
+            self.obstacles.append(agent)
+
+        for y, x in np.argwhere(chars == ord("D")).tolist():
+            cell = self.grid[(x, y)]
+            agent = Destination(self, cell)
+            agent.dest_id = len(self.destinations)
+            self.destinations.append(cell)
+
+        # Roads, obstacles and destinations never change, so their JSON payloads are built once
+        self.roads_json = json.dumps({'positions': [
+            {
+                "id": str(a.unique_id),
+                "x": a.cell.coordinate[0],
+                "y": 1,
+                "z": a.cell.coordinate[1],
+                "direction": a.direction
+            }
+            for a in self.roads
+        ]})
+        self.obstacles_json = json.dumps({'positions': [
+            {"id": str(a.unique_id), "x": a.cell.coordinate[0], "y": 1, "z": a.cell.coordinate[1]}
+            for a in self.obstacles
+        ]})
+        self.destinations_json = json.dumps({'positions': [
+            {"id": str(cell.destination.unique_id), "x": cell.coordinate[0], "y": 1, "z": cell.coordinate[1]}
+            for cell in self.destinations
+        ]})
+
+        # Cells a car can drive through (roads and traffic lights), indexed [y, x]
+        self.accessible = (self.dir_grid >= 0) | (self.tl_index >= 0)
+
+        # Cells in a flat list indexed y * width + x, cheaper than the grid's coordinate lookup
+        self.cells_flat = [self.grid[(x, y)] for y in range(self.height) for x in range(self.width)]
+
+        self.build_destination_distances()
+
+        # Traffic light states and periods, indexed by Traffic_Light.tl_idx
+        self.tl_state = np.array([tl.initial_state for tl in self.traffic_lights], dtype=np.bool_)
+        self.tl_period = np.array([tl.timeToChange for tl in self.traffic_lights], dtype=np.int32)
+
+        # Traffic light positions are fixed, only their state changes between steps
+        self.tl_positions = [
+            {"id": str(tl.unique_id), "x": tl.cell.coordinate[0], "y": 1, "z": tl.cell.coordinate[1]}
+            for tl in self.traffic_lights
+        ]
 
         # Identify the 4 corners as potential spawn points
         corners = [
@@ -87,52 +158,129 @@ class CityModel(Model):
         # Check each corner if it has a Road agent
         for corner_pos in corners:
             cell = self.grid[corner_pos]
-            # Check if there's a Road agent in this corner
-            for agent in cell.agents:
-                if isinstance(agent, Road):
-                    self.spawn_points.append({
-                        'position': corner_pos,
-                        'direction': agent.direction,
-                        'cell': cell
-                    })
-                    break
+            if cell.road is not None:
+                self.spawn_points.append({
+                    'position': corner_pos,
+                    'direction': cell.road.direction,
+                    'cell': cell
+                })
 
         self.running = True
 
+    def build_destination_distances(self):
+        """
+        Precompute, for every destination, how many moves each cell needs to reach it.
+        Runs a BFS backwards from each destination over the road graph. Roads follow the
+        movement rules of the route BFS, but traffic lights may move in all four directions
+        without the opposite-direction check, so the moves are a superset of the route BFS's:
+        UNREACHABLE is definite, other distances are lower bounds. Cells without a road,
+        traffic light or destination can't be entered, and other destinations can't be
+        driven through. The result is self.dest_dist[dest_id, y, x].
+        """
+        width, height = self.width, self.height
+
+        # Reverse adjacency over flat cell indices (y * width + x)
+        predecessors = [[] for _ in range(width * height)]
+        for cell in self.grid.all_cells:
+            if cell.road is None and cell.traffic_light is None:
+                continue
+
+            x, y = cell.coordinate
+            direction_idx = self.dir_grid[y, x]
+            offsets = MOVE_OFFSETS[direction_idx] if direction_idx >= 0 else DELTAS
+
+            for dx, dy in offsets:
+                next_x, next_y = x + dx, y + dy
+                if not (0 <= next_x < width and 0 <= next_y < height):
+                    continue
+
+                next_cell = self.grid[(next_x, next_y)]
+                if next_cell.road is None and next_cell.traffic_light is None and next_cell.destination is None:
+                    continue
+
+                # Never move against the current direction
+                next_direction_idx = self.dir_grid[next_y, next_x]
+                if direction_idx >= 0 and next_direction_idx == OPPOSITE[direction_idx]:
+                    continue
+
+                predecessors[next_y * width + next_x].append(y * width + x)
+
+        self.dest_dist = np.full((len(self.destinations), height, width), UNREACHABLE, dtype=np.uint16)
+        for dest_id, dest_cell in enumerate(self.destinations):
+            x, y = dest_cell.coordinate
+            start = y * width + x
+            distances = [UNREACHABLE] * (width * height)
+            distances[start] = 0
+            queue = deque([start])
+
+            while queue:
+                current = queue.popleft()
+                distance = distances[current] + 1
+                for previous in predecessors[current]:
+                    if distances[previous] == UNREACHABLE:
+                        distances[previous] = distance
+                        queue.append(previous)
+
+            self.dest_dist[dest_id] = np.array(distances, dtype=np.uint16).reshape(height, width)
+
     def is_cell_available_for_spawn(self, cell):
         """Check if a cell is available to spawn a new car."""
         # A cell is available if it doesn't have any Car agents
-        for agent in cell.agents:
-            if isinstance(agent, Car):
-                return False
-        return True
+        return not cell.cars
 
     def spawn_car(self):
         """Spawn cars at ALL available corners simultaneously."""
         # Get available spawn points (corners that are not blocked)
-        available_spawns = [
-            sp for sp in self.spawn_points
-            if self.is_cell_available_for_spawn(sp['cell'])
-        ]
+        available_spawns = [sp for sp in self.spawn_points if self.is_cell_available_for_spawn(sp['cell'])]
 
         # If no spawn points available, check if all are blocked
         if len(available_spawns) == 0:
-            # All corners are blocked, end simulation
-            self.running = False
+            # End the simulation only if the corners stay blocked for many spawn attempts
+            self.blocked_spawn_ticks += 1
+            if self.blocked_spawn_ticks > self.max_blocked_spawn_ticks:
+                self.running = False
             return
 
-        # Spawn a car at EACH available corner
-        for spawn in available_spawns:
-            # Randomly choose a destination for this car
-            destination = self.random.choice(self.destinations)
+        self.blocked_spawn_ticks = 0
+
+        # Randomly choose a destination for each car with a single draw
+        dest_ids = self.rng.integers(0, len(self.destinations), size=len(available_spawns))
 
+        # Spawn a car at EACH available corner
+        for spawn, dest_id in zip(available_spawns, dest_ids):
             # Create a new car at this spawn point with the assigned destination
-            car = Car(self, spawn['cell'], destination)
+            car = Car(self, spawn['cell'], self.destinations[dest_id])
+            self.active_cars.add(car)
 
             # Update metrics
             self.total_spawned += 1
             self.current_active_cars += 1
 
+    def acquire_car_slot(self, car):
+        """Reserve a slot in the car arrays for a new car and return its index."""
+        if self.free_car_slots:
+            slot = self.free_car_slots.pop()
+        else:
+            slot = self.num_car_slots
+            self.num_car_slots += 1
+
+            # Double the arrays (zero padded) when every slot is in use
+            if slot == len(self.car_alive):
+                extra = (0, len(self.car_alive))
+                self.car_ids = np.pad(self.car_ids, extra)
+                self.car_x = np.pad(self.car_x, extra)
+                self.car_y = np.pad(self.car_y, extra)
+                self.car_alive = np.pad(self.car_alive, extra)
+
+        self.car_ids[slot] = car.unique_id
+        self.car_alive[slot] = True
+        return slot
+
+    def release_car_slot(self, slot):
+        """Mark a car slot as free so a later car can reuse it."""
+        self.car_alive[slot] = False
+        self.free_car_slots.append(slot)
+
     def car_reached_destination(self):
         """Called when a car reaches its destination to update metrics."""
         self.total_reached_destination += 1
@@ -154,10 +302,29 @@ class CityModel(Model):
         print(f"Current active cars: {self.current_active_cars}")
         print(f"========================\n")
 
+    def invalidate_routes(self):
+        """
+        Forget every cached route. Routes are computed from dir_grid, accessible and dest_dist,
+        which are built once in __init__, so the cache stays valid for the whole run; this is
+        only needed if those arrays are rebuilt. It does not pick up other changes to the map.
+        """
+        self.route_cache.clear()
+
+    def step_traffic_lights(self):
+        """Toggle every traffic light whose period divides the current step."""
+        self.tl_state ^= (self.steps % self.tl_period) == 0
+
     def step(self):
         """Advance the model by one step."""
-        # Execute all agent steps
-        self.agents.shuffle_do("step")
+        # Update all traffic lights at once, then step the cars.
+        # Roads, obstacles and destinations never act, so they are not stepped.
+        self.step_traffic_lights()
+
+        # Cars still move in a random order, since the first to move takes a contested cell;
+        # one permutation from the model's generator is cheaper than shuffling weakrefs
+        cars = list(self.active_cars)
+        for i in self.rng.permutation(len(cars)).tolist():
+            cars[i].step()
 
         # Spawn new cars based on configured interval
         if self.steps % self.spawn_interval == 0 and self.steps > 0:
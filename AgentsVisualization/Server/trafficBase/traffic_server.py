@@ -1,16 +1,41 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request
 from flask_cors import CORS, cross_origin
+from waitress import serve
+import orjson
+import threading
 from traffic_base.model import CityModel
-from traffic_base.agent import Car, Obstacle, Traffic_Light, Road, Destination
 
 # Model parameters
 cityModel = None
 currentStep = 0
 
+# Requests are served from several threads; the lock keeps readers from seeing the model mid-step
+modelLock = threading.Lock()
+
 # Create the Flask application
 app = Flask("Traffic Simulation")
 cors = CORS(app, origins=['http://localhost'])
 
+
+def json_response(payload, option=None):
+    """Serialize the payload with orjson, which is much faster than the standard json module."""
+    return Response(orjson.dumps(payload, option=option), mimetype='application/json')
+
+
+def car_payload(model):
+    """Positions and directions of the cars currently in the model, as sent by /getCars and /getState."""
+    return [
+        {
+            "id": str(a.unique_id),
+            "x": a.cell.coordinate[0],
+            "y": 1,
+            "z": a.cell.coordinate[1],
+            "direction": a.get_road_direction()
+        }
+        for a in model.active_cars
+    ]
+
+
 @app.route('/init', methods=['GET', 'POST'])
 @cross_origin()
 def initModel():
@@ -22,7 +47,7 @@ def initModel():
             currentStep = 0
         except Exception as e:
             print(e)
-            return jsonify({"message": "Error initializing the model"}), 500
+            return json_response({"message": "Error initializing the model"}), 500
     else:
         N = 5
     
@@ -31,7 +56,7 @@ def initModel():
     # Create the CityModel
     cityModel = CityModel(N)
     
-    return jsonify({"message": f"City model initialized with {N} cars."})
+    return json_response({"message": f"City model initialized with {N} cars."})
 
 
 @app.route('/getAgents', methods=['GET'])
@@ -41,27 +66,20 @@ def getAgents():
 
     if request.method == 'GET':
         try:
-            # Get all Car agents
-            agentCells = cityModel.grid.all_cells.select(
-                lambda cell: any(isinstance(obj, Car) for obj in cell.agents)
-            ).cells
-
-            agents = [
-                (cell.coordinate, agent)
-                for cell in agentCells
-                for agent in cell.agents
-                if isinstance(agent, Car)
-            ]
-
-            agentPositions = [
-                {"id": str(a.unique_id), "x": coordinate[0], "y": 1, "z": coordinate[1]}
-                for (coordinate, a) in agents
-            ]
-
-            return jsonify({'positions': agentPositions})
+            # Columns read straight from the model's car arrays; entry i of each list is one car.
+            # Every car is at y = 1, so it is not sent.
+            with modelLock:
+                alive = cityModel.car_alive
+                agentColumns = {
+                    'ids': cityModel.car_ids[alive],
+                    'x': cityModel.car_x[alive],
+                    'z': cityModel.car_y[alive],
+                }
+
+            return json_response(agentColumns, option=orjson.OPT_SERIALIZE_NUMPY)
         except Exception as e:
             print(e)
-            return jsonify({"message": "Error with the agent positions"}), 500
+            return json_response({"message": "Error with the agent positions"}), 500
 
 
 @app.route('/getCars', methods=['GET'])
@@ -69,37 +87,18 @@ def getAgents():
 def getCarsEndpoint():
     global cityModel
     if cityModel is None:
-        return jsonify({"message": "Model not initialized"}), 400
+        return json_response({"message": "Model not initialized"}), 400
 
     if request.method == 'GET':
         try:
-            # Get all Car agents
-            carCells = cityModel.grid.all_cells.select(
-                lambda cell: any(isinstance(obj, Car) for obj in cell.agents)
-            ).cells
-
-            agents = [
-                (cell.coordinate, agent)
-                for cell in carCells
-                for agent in cell.agents
-                if isinstance(agent, Car)
-            ]
-
-            carPositions = [
-                {
-                    "id": str(a.unique_id),
-                    "x": coordinate[0],
-                    "y": 1,
-                    "z": coordinate[1],
-                    "direction": a.get_road_direction()
-                }
-                for (coordinate, a) in agents
-            ]
+            # The model keeps a registry of the cars currently in the simulation
+            with modelLock:
+                carPositions = car_payload(cityModel)
 
-            return jsonify({'positions': carPositions})
+            return json_response({'positions': carPositions})
         except Exception as e:
             print(e)
-            return jsonify({"message": "Error with car positions"}), 500
+            return json_response({"message": "Error with car positions"}), 500
 
 
 @app.route('/getObstacles', methods=['GET'])
@@ -107,36 +106,11 @@ def getCarsEndpoint():
 def getObstacles():
     global cityModel
     if cityModel is None:
-        return jsonify({"message": "Model not initialized"}), 400
+        return json_response({"message": "Model not initialized"}), 400
 
     if request.method == 'GET':
-        try:
-            # Get all Obstacle agents
-            obstacleCells = cityModel.grid.all_cells.select(
-                lambda cell: any(isinstance(obj, Obstacle) for obj in cell.agents)
-            )
-            
-            agents = [
-                (cell.coordinate, agent)
-                for cell in obstacleCells
-                for agent in cell.agents
-                if isinstance(agent, Obstacle)
-            ]
-            
-            obstaclePositions = []
-            for (coordinate, a) in agents:
-                obstacle_data = {
-                    "id": str(a.unique_id), 
-                    "x": coordinate[0], 
-                    "y": 1, 
-                    "z": coordinate[1]
-                }
-                obstaclePositions.append(obstacle_data)
-            
-            return jsonify({'positions': obstaclePositions})
-        except Exception as e:
-            print(e)
-            return jsonify({"message": "Error with obstacle positions"}), 500
+        # Static agents are serialized once when the model is created
+        return Response(cityModel.obstacles_json, mimetype='application/json')
 
 
 @app.route('/getTrafficLights', methods=['GET'])
@@ -144,37 +118,21 @@ def getObstacles():
 def getTrafficLights():
     global cityModel
     if cityModel is None:
-        return jsonify({"message": "Model not initialized"}), 400
+        return json_response({"message": "Model not initialized"}), 400
 
     if request.method == 'GET':
         try:
-            # Get all Traffic_Light agents
-            trafficLightCells = cityModel.grid.all_cells.select(
-                lambda cell: any(isinstance(obj, Traffic_Light) for obj in cell.agents)
-            )
-            
-            agents = [
-                (cell.coordinate, agent)
-                for cell in trafficLightCells
-                for agent in cell.agents
-                if isinstance(agent, Traffic_Light)
-            ]
-            
-            trafficLightPositions = [
-                {
-                    "id": str(a.unique_id), 
-                    "x": coordinate[0], 
-                    "y": 1, 
-                    "z": coordinate[1],
-                    "state": a.state
-                }
-                for (coordinate, a) in agents
-            ]
-            
-            return jsonify({'positions': trafficLightPositions})
+            # Positions are precomputed by the model, only the states are read here
+            with modelLock:
+                trafficLightPositions = [
+                    {**position, "state": tl.state}
+                    for position, tl in zip(cityModel.tl_positions, cityModel.traffic_lights)
+                ]
+
+            return json_response({'positions': trafficLightPositions})
         except Exception as e:
             print(e)
-            return jsonify({"message": "Error with traffic light positions"}), 500
+            return json_response({"message": "Error with traffic light positions"}), 500
 
 
 @app.route('/getRoads', methods=['GET'])
@@ -182,37 +140,11 @@ def getTrafficLights():
 def getRoads():
     global cityModel
     if cityModel is None:
-        return jsonify({"message": "Model not initialized"}), 400
+        return json_response({"message": "Model not initialized"}), 400
 
     if request.method == 'GET':
-        try:
-            # Get all Road agents
-            roadCells = cityModel.grid.all_cells.select(
-                lambda cell: any(isinstance(obj, Road) for obj in cell.agents)
-            )
-            
-            agents = [
-                (cell.coordinate, agent)
-                for cell in roadCells
-                for agent in cell.agents
-                if isinstance(agent, Road)
-            ]
-            
-            roadPositions = [
-                {
-                    "id": str(a.unique_id), 
-                    "x": coordinate[0], 
-                    "y": 1, 
-                    "z": coordinate[1],
-                    "direction": a.direction
-                }
-                for (coordinate, a) in agents
-            ]
-            
-            return jsonify({'positions': roadPositions})
-        except Exception as e:
-            print(e)
-            return jsonify({"message": "Error with road positions"}), 500
+        # Static agents are serialized once when the model is created
+        return Response(cityModel.roads_json, mimetype='application/json')
 
 
 @app.route('/getDestinations', methods=['GET'])
@@ -220,31 +152,49 @@ def getRoads():
 def getDestinations():
     global cityModel
     if cityModel is None:
-        return jsonify({"message": "Model not initialized"}), 400
+        return json_response({"message": "Model not initialized"}), 400
+
+    if request.method == 'GET':
+        # Static agents are serialized once when the model is created
+        return Response(cityModel.destinations_json, mimetype='application/json')
+
+
+@app.route('/getStatics', methods=['GET'])
+@cross_origin()
+def getStatics():
+    global cityModel
+    if cityModel is None:
+        return json_response({"message": "Model not initialized"}), 400
+
+    if request.method == 'GET':
+        # Roads, obstacles and destinations in one payload, from the JSON cached by the model
+        statics = (
+            f'{{"roads": {cityModel.roads_json}, '
+            f'"obstacles": {cityModel.obstacles_json}, '
+            f'"destinations": {cityModel.destinations_json}}}'
+        )
+        return Response(statics, mimetype='application/json')
+
+
+@app.route('/getState', methods=['GET'])
+@cross_origin()
+def getState():
+    global cityModel
+    if cityModel is None:
+        return json_response({"message": "Model not initialized"}), 400
 
     if request.method == 'GET':
         try:
-            # Get all Destination agents
-            destinationCells = cityModel.grid.all_cells.select(
-                lambda cell: any(isinstance(obj, Destination) for obj in cell.agents)
-            )
-            
-            agents = [
-                (cell.coordinate, agent)
-                for cell in destinationCells
-                for agent in cell.agents
-                if isinstance(agent, Destination)
-            ]
-            
-            destinationPositions = [
-                {"id": str(a.unique_id), "x": coordinate[0], "y": 1, "z": coordinate[1]}
-                for (coordinate, a) in agents
-            ]
-            
-            return jsonify({'positions': destinationPositions})
+            # Only what changes between steps: car positions and traffic light states.
+            # Light states are in the same order as the lights from /getTrafficLights.
+            with modelLock:
+                carPositions = car_payload(cityModel)
+                lightStates = cityModel.tl_state.tolist()
+
+            return json_response({'cars': carPositions, 'lights': lightStates})
         except Exception as e:
             print(e)
-            return jsonify({"message": "Error with destination positions"}), 500
+            return json_response({"message": "Error getting the simulation state"}), 500
 
 
 @app.route('/update', methods=['GET'])
@@ -253,14 +203,15 @@ def updateModel():
     global currentStep, cityModel
     if request.method == 'GET':
         if cityModel is None:
-            return jsonify({"message": "Model not initialized. Call /init first."}), 400
+            return json_response({"message": "Model not initialized. Call /init first."}), 400
         try:
-            cityModel.step()
-            currentStep += 1
-            return jsonify({'message': f'Model updated to step {currentStep}.', 'currentStep': currentStep})
+            with modelLock:
+                cityModel.step()
+                currentStep += 1
+            return json_response({'message': f'Model updated to step {currentStep}.', 'currentStep': currentStep})
         except Exception as e:
             print(e)
-            return jsonify({"message": "Error during step."}), 500
+            return json_response({"message": "Error during step."}), 500
 
 
 @app.route('/getMetrics', methods=['GET'])
@@ -268,17 +219,17 @@ def updateModel():
 def getMetrics():
     global cityModel, currentStep
     if cityModel is None:
-        return jsonify({"message": "Model not initialized"}), 400
+        return json_response({"message": "Model not initialized"}), 400
 
     if request.method == 'GET':
         try:
             metrics = cityModel.get_metrics()
             metrics['current_step'] = currentStep
             metrics['spawn_interval'] = cityModel.spawn_interval
-            return jsonify({'metrics': metrics})
+            return json_response({'metrics': metrics})
         except Exception as e:
             print(e)
-            return jsonify({"message": "Error getting metrics"}), 500
+            return json_response({"message": "Error getting metrics"}), 500
 
 
 @app.route('/setSpawnInterval', methods=['POST'])
@@ -286,18 +237,20 @@ def getMetrics():
 def setSpawnInterval():
     global cityModel
     if cityModel is None:
-        return jsonify({"message": "Model not initialized"}), 400
+        return json_response({"message": "Model not initialized"}), 400
 
     try:
         interval = int(request.json.get('spawn_interval', 1))
         if interval < 1:
             interval = 1
         cityModel.spawn_interval = interval
-        return jsonify({'message': f'Spawn interval set to {interval}', 'spawn_interval': interval})
+        return json_response({'message': f'Spawn interval set to {interval}', 'spawn_interval': interval})
     except Exception as e:
         print(e)
-        return jsonify({"message": "Error setting spawn interval"}), 500
+        return json_response({"message": "Error setting spawn interval"}), 500
 
 
 if __name__ == '__main__':
-    app.run(host="localhost", port=8585, debug=True)
+    # Production WSGI server: no debugger or reloader, and requests are handled concurrently.
+    # A single process keeps one shared cityModel.
+    serve(app, host="localhost", port=8585, threads=8)
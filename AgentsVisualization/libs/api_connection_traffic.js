@@ -66,35 +66,7 @@ async function getCars() {
 
         if (response.ok) {
             let result = await response.json();
-
-            // Obtener IDs de coches actuales del servidor
-            const serverCarIds = new Set(result.positions.map(car => car.id));
-
-            // Eliminar coches que ya no estan en el servidor
-            for (let i = cars.length - 1; i >= 0; i--) {
-                if (!serverCarIds.has(cars[i].id)) {
-                    console.log(`Car ${cars[i].id} reached destination - removing from array`);
-                    cars.splice(i, 1);
-                }
-            }
-
-            for (const car of result.positions) {
-                const current_car = cars.find((object3d) => object3d.id == car.id);
-
-                if (current_car != undefined) {
-                    // Double buffering: old <- current, current <- new
-                    current_car.oldPosArray = current_car.posArray;
-                    current_car.position = { x: car.x, y: car.y, z: car.z };
-                    current_car.direction = car.direction;
-                } else {
-                    // Coche nuevo: agregar al array
-                    const newCar = new Object3D(car.id, [car.x, car.y, car.z]);
-                    newCar['oldPosArray'] = newCar.posArray;
-                    newCar['direction'] = car.direction;
-                    newCar.color = [1.0, 0.0, 0.0, 1.0];
-                    cars.push(newCar);
-                }
-            }
+            syncCars(result.positions);
         }
 
     } catch (error) {
@@ -102,6 +74,40 @@ async function getCars() {
     }
 }
 
+/**
+ * Updates the cars array with the car positions sent by the server.
+ */
+function syncCars(positions) {
+    // Obtener IDs de coches actuales del servidor
+    const serverCarIds = new Set(positions.map(car => car.id));
+
+    // Eliminar coches que ya no estan en el servidor
+    for (let i = cars.length - 1; i >= 0; i--) {
+        if (!serverCarIds.has(cars[i].id)) {
+            console.log(`Car ${cars[i].id} reached destination - removing from array`);
+            cars.splice(i, 1);
+        }
+    }
+
+    for (const car of positions) {
+        const current_car = cars.find((object3d) => object3d.id == car.id);
+
+        if (current_car != undefined) {
+            // Double buffering: old <- current, current <- new
+            current_car.oldPosArray = current_car.posArray;
+            current_car.position = { x: car.x, y: car.y, z: car.z };
+            current_car.direction = car.direction;
+        } else {
+            // Coche nuevo: agregar al array
+            const newCar = new Object3D(car.id, [car.x, car.y, car.z]);
+            newCar['oldPosArray'] = newCar.posArray;
+            newCar['direction'] = car.direction;
+            newCar.color = [1.0, 0.0, 0.0, 1.0];
+            cars.push(newCar);
+        }
+    }
+}
+
 /**
  * Retrieves the current positions of all obstacles from the server.
  */
@@ -111,12 +117,7 @@ async function getObstacles() {
 
         if (response.ok) {
             let result = await response.json();
-
-            for (const obstacle of result.positions) {
-                const newObstacle = new Object3D(obstacle.id, [obstacle.x, obstacle.y, obstacle.z]);
-                newObstacle.color = [0.3, 0.3, 0.3, 1.0]; // Dark gray for obstacles
-                obstacles.push(newObstacle);
-            }
+            addObstacles(result.positions);
         }
 
     } catch (error) {
@@ -124,6 +125,17 @@ async function getObstacles() {
     }
 }
 
+/**
+ * Adds the obstacles sent by the server to the obstacles array.
+ */
+function addObstacles(positions) {
+    for (const obstacle of positions) {
+        const newObstacle = new Object3D(obstacle.id, [obstacle.x, obstacle.y, obstacle.z]);
+        newObstacle.color = [0.3, 0.3, 0.3, 1.0]; // Dark gray for obstacles
+        obstacles.push(newObstacle);
+    }
+}
+
 /**
  * Retrieves the current positions and states of all traffic lights.
  */
@@ -167,13 +179,7 @@ async function getRoads() {
 
         if (response.ok) {
             let result = await response.json();
-
-            for (const road of result.positions) {
-                const newRoad = new Object3D(road.id, [road.x, road.y, road.z]);
-                newRoad['direction'] = road.direction;
-                newRoad.color = [0.6, 0.6, 0.6, 1.0]; // Light gray for roads
-                roads.push(newRoad);
-            }
+            addRoads(result.positions);
         }
 
     } catch (error) {
@@ -181,6 +187,18 @@ async function getRoads() {
     }
 }
 
+/**
+ * Adds the roads sent by the server to the roads array.
+ */
+function addRoads(positions) {
+    for (const road of positions) {
+        const newRoad = new Object3D(road.id, [road.x, road.y, road.z]);
+        newRoad['direction'] = road.direction;
+        newRoad.color = [0.6, 0.6, 0.6, 1.0]; // Light gray for roads
+        roads.push(newRoad);
+    }
+}
+
 /**
  * Retrieves all destination positions.
  */
@@ -190,12 +208,66 @@ async function getDestinations() {
 
         if (response.ok) {
             let result = await response.json();
+            addDestinations(result.positions);
+        }
 
-            for (const dest of result.positions) {
-                const newDest = new Object3D(dest.id, [dest.x, dest.y, dest.z]);
-                newDest.color = [0.0, 1.0, 0.0, 1.0]; // Green for destinations
-                destinations.push(newDest);
-            }
+    } catch (error) {
+        console.log(error);
+    }
+}
+
+/**
+ * Adds the destinations sent by the server to the destinations array.
+ */
+function addDestinations(positions) {
+    for (const dest of positions) {
+        const newDest = new Object3D(dest.id, [dest.x, dest.y, dest.z]);
+        newDest.color = [0.0, 1.0, 0.0, 1.0]; // Green for destinations
+        destinations.push(newDest);
+    }
+}
+
+/**
+ * Retrieves roads, obstacles and destinations in a single request.
+ * They never change, so this only needs to be called once.
+ */
+async function getStatics() {
+    try {
+        let response = await fetch(agent_server_uri + "getStatics");
+
+        if (response.ok) {
+            let result = await response.json();
+            addRoads(result.roads.positions);
+            addObstacles(result.obstacles.positions);
+            addDestinations(result.destinations.positions);
+        }
+
+    } catch (error) {
+        console.log(error);
+    }
+}
+
+/**
+ * Retrieves everything that changes between steps (cars and traffic light states)
+ * in a single request. Traffic lights must have been loaded with getTrafficLights.
+ */
+async function getState() {
+    try {
+        let response = await fetch(agent_server_uri + "getState");
+
+        if (response.ok) {
+            let result = await response.json();
+            syncCars(result.cars);
+
+            // Light states come in the same order as the lights from getTrafficLights
+            result.lights.forEach((state, i) => {
+                const current_light = trafficLights[i];
+
+                if (current_light != undefined) {
+                    current_light.state = state;
+                    current_light.color = state ? [0.0, 1.0, 0.0, 1.0] : [1.0, 0.0, 0.0, 1.0];
+                }
+            });
         }
 
     } catch (error) {
@@ -254,8 +326,7 @@ async function update() {
         let response = await fetch(agent_server_uri + "update");
 
         if (response.ok) {
-            await getCars();
-            await getTrafficLights();
+            await getState();
             await getMetrics();
         }
 
@@ -278,6 +349,8 @@ export {
     getTrafficLights,
     getRoads,
     getDestinations,
+    getStatics,
+    getState,
     getMetrics,
     setSpawnInterval
 };
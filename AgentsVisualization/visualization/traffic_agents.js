@@ -16,8 +16,8 @@ import { preloadModel } from '../libs/obj_loader.js';
 // Comunicacion con la API del servidor
 import {
     cars, obstacles, trafficLights, roads, destinations, metrics,
-    initTrafficModel, update, getCars, getObstacles,
-    getTrafficLights, getRoads, getDestinations, getMetrics, setSpawnInterval
+    initTrafficModel, update, getCars, getStatics,
+    getTrafficLights, getMetrics, setSpawnInterval
 } from '../libs/api_connection_traffic.js';
 
 // Shaders para iluminacion Phong
@@ -121,10 +121,8 @@ async function main() {
 
     // Traer todos los elementos de la ciudad desde el servidor
     await getCars();
-    await getObstacles();
+    await getStatics();
     await getTrafficLights();
-    await getRoads();
-    await getDestinations();
     await getMetrics();
 
     setupScene();
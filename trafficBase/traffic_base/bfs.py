@@ -0,0 +1,113 @@
+from numba import njit
+import numpy as np
+
+# Road directions as small integers, indexing DELTAS for the (dx, dy) of one move
+DIRECTIONS = ("Up", "Down", "Right", "Left")
+DELTAS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+# Index of the opposite direction, and the moves allowed from a road: forward or a lane change
+OPPOSITE = (1, 0, 3, 2)
+MOVE_OFFSETS = (
+    ((0, 1), (-1, 0), (1, 0)),
+    ((0, -1), (-1, 0), (1, 0)),
+    ((1, 0), (0, 1), (0, -1)),
+    ((-1, 0), (0, 1), (0, -1)),
+)
+
+# Distance of cells that cannot reach a destination in the model's dest_dist fields
+UNREACHABLE = 0xFFFF
+
+# The same tables as arrays for the compiled search
+DELTAS_ARRAY = np.array(DELTAS, dtype=np.int32)
+OPPOSITE_ARRAY = np.array(OPPOSITE, dtype=np.int32)
+MOVE_OFFSETS_ARRAY = np.array(MOVE_OFFSETS, dtype=np.int32)
+
+@njit(cache=True)
+def find_route(dir_map, accessible, distances, start_x, start_y, dest_x, dest_y, start_direction):
+    """
+    Find a route from (start_x, start_y) to (dest_x, dest_y) using BFS over the road arrays.
+    Args:
+        dir_map: Road direction index per cell, indexed [y, x]; -1 where there is no road
+        accessible: Whether a car can drive through each cell, indexed [y, x]
+        distances: Moves from each cell to the destination, the model's dest_dist row for it
+        start_x, start_y: The position the route starts from
+        dest_x, dest_y: The destination, which can always be entered
+        start_direction: Direction index the car is heading in, -1 if unknown
+    Returns:
+        A (k, 2) array with the (x, y) positions after the start up to the destination, empty if there is no route.
+    """
+    height, width = dir_map.shape
+
+    # The distance field is the backward search, done once per destination:
+    # a start that can't reach the destination needs no search at all
+    if distances[start_y, start_x] == UNREACHABLE:
+        return np.empty((0, 2), dtype=np.int32)
+
+    visited = np.zeros((height, width), dtype=np.bool_)
+    parents = np.full((height, width), -1, dtype=np.int32)  # Flat index (y * width + x) of the previous cell
+    visited[start_y, start_x] = True
+
+    # Ring buffer queue of (x, y, last valid direction of the path); every cell is queued at most once
+    queue = np.empty((height * width, 3), dtype=np.int32)
+    queue[0, 0] = start_x
+    queue[0, 1] = start_y
+    queue[0, 2] = start_direction
+    head = 0
+    tail = 1
+
+    while head != tail:
+        x = queue[head, 0]
+        y = queue[head, 1]
+        path_direction = queue[head, 2]
+        head += 1
+
+        # If we reached the destination, walk the parents back to the start
+        if x == dest_x and y == dest_y:
+            length = 0
+            position = y * width + x
+            while position != start_y * width + start_x:
+                length += 1
+                position = parents[position // width, position % width]
+
+            route = np.empty((length, 2), dtype=np.int32)
+            position = y * width + x
+            for i in range(length - 1, -1, -1):
+                route[i, 0] = position % width
+                route[i, 1] = position // width
+                position = parents[position // width, position % width]
+            return route
+
+        # Use the cell's direction if available, otherwise keep the path direction
+        # This is critical for traffic lights, which don't have a direction
+        cell_direction = dir_map[y, x]
+        effective_direction = cell_direction if cell_direction >= 0 else path_direction
+
+        # Move forward or change lanes, never in the opposite direction; try all four without a direction
+        offsets = MOVE_OFFSETS_ARRAY[effective_direction] if effective_direction >= 0 else DELTAS_ARRAY
+
+        for i in range(offsets.shape[0]):
+            next_x = x + offsets[i, 0]
+            next_y = y + offsets[i, 1]
+            if next_x < 0 or next_x >= width or next_y < 0 or next_y >= height or visited[next_y, next_x]:
+                continue
+
+            # Roads and traffic lights are accessible; of the destinations, only ours
+            if not accessible[next_y, next_x] and (next_x != dest_x or next_y != dest_y):
+                continue
+
+            # Dead ends that can't reach the destination never lead to it, skip them
+            if distances[next_y, next_x] == UNREACHABLE:
+                continue
+
+            # Never go from Down to Up (or similar), even through a semaphore
+            next_direction = dir_map[next_y, next_x]
+            if effective_direction >= 0 and next_direction == OPPOSITE_ARRAY[effective_direction]:
+                continue
+
+            visited[next_y, next_x] = True
+            parents[next_y, next_x] = y * width + x
+            queue[tail, 0] = next_x
+            queue[tail, 1] = next_y
+            queue[tail, 2] = next_direction if next_direction >= 0 else effective_direction
+            tail += 1
+
+    return np.empty((0, 2), dtype=np.int32)